@@ -12,6 +12,13 @@ ASSOCIATED_TOKEN_PROGRAM_ID = os.getenv("ASSOCIATED_TOKEN_PROGRAM_ID", "ATokenGP
 # Адрес кошелька владельца для получения 1% комиссии от стейкинга
 OWNER_WALLET = os.getenv("OWNER_WALLET", "")  # Нужно установить реальный адрес
 SERVER_BASE_URL = os.getenv("SERVER_BASE_URL", "http://127.0.0.1:8000")
+# Настройки priority fee для транзакций lock/claim
+PRIORITY_FEE_PERCENTILE = float(os.getenv("PRIORITY_FEE_PERCENTILE", "75"))
+PRIORITY_FEE_REFRESH_SECONDS = float(os.getenv("PRIORITY_FEE_REFRESH_SECONDS", "10"))
+PRIORITY_FEE_MIN_MICROLAMPORTS = int(os.getenv("PRIORITY_FEE_MIN_MICROLAMPORTS", "1000"))
+PRIORITY_FEE_MAX_MICROLAMPORTS = int(os.getenv("PRIORITY_FEE_MAX_MICROLAMPORTS", "2000000"))
+# Запас к лимиту вычислительных единиц, измеренному симуляцией
+COMPUTE_UNIT_MARGIN = float(os.getenv("COMPUTE_UNIT_MARGIN", "1.2"))
 
 if not TELEGRAM_TOKEN:
     raise ValueError("Необходимо установить переменную окружения TELEGRAM_TOKEN") 
\ No newline at end of file
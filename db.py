@@ -1,5 +1,15 @@
+import argparse
+import csv
 import sqlite3
-from typing import Optional
+import sys
+from typing import IO, Iterable, Iterator, List, Optional, Tuple
+
+# Параметры массового импорта
+IMPORT_BATCH_SIZE = 5000        # строк на один executemany
+IMPORT_TRANSACTION_SIZE = 100000  # строк на одну транзакцию
+IMPORT_LOOKUP_SIZE = 500        # адресов в одном запросе проверки конфликтов
+IMPORT_HEADER = ("telegram_id", "wallet_address")
+MAX_TELEGRAM_ID = 2**63 - 1       # предел SQLite INTEGER
 
 def init_db():
     conn = sqlite3.connect('bot_database.db')
@@ -48,6 +58,167 @@ def get_wallet(telegram_id: int) -> Optional[str]:
     finally:
         conn.close()
 
-if __name__ == '__main__':
+# --- МАССОВЫЙ ИМПОРТ КОШЕЛЬКОВ ---
+
+def _validate_rows(rows: List[Tuple[int, str, str]]):
+    """
+    Валидирует пачку строк.
+    Возвращает (accepted, rejected), где accepted — (номер строки, telegram_id, адрес),
+    а rejected — (номер строки, telegram_id, адрес, причина).
+    """
+    from solders.pubkey import Pubkey
+
+    accepted = []
+    rejected = []
+    for line_no, raw_id, raw_wallet in rows:
+        try:
+            telegram_id = int(raw_id)
+        except (TypeError, ValueError):
+            telegram_id = None
+        if telegram_id is None or not 0 < telegram_id <= MAX_TELEGRAM_ID:
+            rejected.append((line_no, raw_id, raw_wallet, "некорректный telegram_id"))
+            continue
+        wallet_address = (raw_wallet or "").strip()
+        try:
+            Pubkey.from_string(wallet_address)
+        except Exception:
+            rejected.append((line_no, raw_id, raw_wallet, "некорректный адрес Solana"))
+            continue
+        accepted.append((line_no, telegram_id, wallet_address))
+    return accepted, rejected
+
+def _read_wallet_rows(f: IO[str]) -> Iterator[Tuple[int, str, str]]:
+    """Читает CSV вида `telegram_id,wallet_address` (заголовок с этими именами необязателен)."""
+    for line_no, row in enumerate(csv.reader(f), start=1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        if line_no == 1 and tuple(cell.strip().lower() for cell in row[:2]) == IMPORT_HEADER:
+            continue
+        raw_id = row[0].strip()
+        raw_wallet = row[1] if len(row) > 1 else ""
+        yield line_no, raw_id, raw_wallet
+
+def _chunked(items: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _wallet_owners(cursor: sqlite3.Cursor, wallets: List[str]) -> dict:
+    """Возвращает {адрес: telegram_id} для уже привязанных адресов из списка."""
+    owners = {}
+    for chunk in _chunked(wallets, IMPORT_LOOKUP_SIZE):
+        placeholders = ",".join("?" * len(chunk))
+        cursor.execute(
+            f"SELECT wallet_address, telegram_id FROM users WHERE wallet_address IN ({placeholders})", chunk
+        )
+        owners.update(cursor.fetchall())
+    return owners
+
+def bulk_import_wallets(rows: Iterable[Tuple[int, str, str]]) -> Tuple[int, list]:
+    """
+    Массово привязывает кошельки к Telegram ID.
+    Строки валидируются и записываются пачками executemany
+    внутри крупных транзакций. Повторы telegram_id или адреса внутри файла и
+    адреса, уже привязанные к другому пользователю, попадают в отклонённые.
+    Возвращает (количество записанных строк, список отклонённых строк).
+    """
     init_db()
-    print("База данных инициализирована.") 
\ No newline at end of file
+    conn = sqlite3.connect('bot_database.db', isolation_level=None)
+    cursor = conn.cursor()
+    cursor.execute("PRAGMA synchronous=NORMAL")
+
+    imported = 0
+    in_transaction = 0
+    rejects = []
+    seen_ids = {}
+    seen_wallets = {}
+    try:
+        cursor.execute("BEGIN")
+        for rows_batch in _chunked(rows, IMPORT_BATCH_SIZE):
+            batch, rejected = _validate_rows(rows_batch)
+            rejects.extend(rejected)
+            owners = _wallet_owners(cursor, [wallet for _, _, wallet in batch])
+            to_store = []
+            for line_no, telegram_id, wallet in batch:
+                owner = owners.get(wallet)
+                if telegram_id in seen_ids:
+                    reason = f"telegram_id уже указан в строке {seen_ids[telegram_id]}"
+                elif wallet in seen_wallets:
+                    reason = f"адрес уже указан в строке {seen_wallets[wallet]}"
+                elif owner is not None and owner != telegram_id:
+                    reason = f"адрес уже привязан к telegram_id {owner}"
+                else:
+                    seen_ids[telegram_id] = line_no
+                    seen_wallets[wallet] = line_no
+                    to_store.append((telegram_id, wallet))
+                    continue
+                rejects.append((line_no, str(telegram_id), wallet, reason))
+
+            cursor.executemany(
+                "INSERT INTO users (telegram_id, wallet_address) VALUES (?, ?) "
+                "ON CONFLICT(telegram_id) DO UPDATE SET wallet_address = excluded.wallet_address",
+                to_store,
+            )
+            imported += len(to_store)
+            in_transaction += len(to_store)
+            if in_transaction >= IMPORT_TRANSACTION_SIZE:
+                cursor.execute("COMMIT")
+                cursor.execute("BEGIN")
+                in_transaction = 0
+        cursor.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            cursor.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+    return imported, rejects
+
+def _main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Управление базой данных бота.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    import_parser = subparsers.add_parser(
+        "import", help="Массовый импорт кошельков из CSV (telegram_id,wallet_address)."
+    )
+    import_parser.add_argument("csv_path", help="Путь к CSV-файлу.")
+    import_parser.add_argument("--rejects", default=None, help="Куда сохранить отклонённые строки (CSV).")
+
+    args = parser.parse_args(argv)
+
+    if args.command != "import":
+        init_db()
+        print("База данных инициализирована.")
+        return
+
+    try:
+        csv_file = open(args.csv_path, newline='', encoding='utf-8')
+    except OSError as e:
+        print(f"Не удалось открыть файл {args.csv_path}: {e.strerror}", file=sys.stderr)
+        sys.exit(1)
+    with csv_file:
+        imported, rejects = bulk_import_wallets(_read_wallet_rows(csv_file))
+    print(f"Импортировано кошельков: {imported}")
+    print(f"Отклонено строк: {len(rejects)}")
+
+    if rejects:
+        rejects.sort()
+        if args.rejects:
+            with open(args.rejects, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                writer.writerow(["line", "telegram_id", "wallet_address", "reason"])
+                writer.writerows(rejects)
+            print(f"Отклонённые строки сохранены в {args.rejects}")
+        else:
+            for line_no, raw_id, raw_wallet, reason in rejects[:20]:
+                print(f"  строка {line_no}: {raw_id},{raw_wallet} — {reason}", file=sys.stderr)
+            if len(rejects) > 20:
+                print(f"  ... и ещё {len(rejects) - 20} (используйте --rejects)", file=sys.stderr)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,236 @@
+import base64
+import json
+import math
+import threading
+import time
+import urllib.request
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from solders.instruction import Instruction
+from solders.message import Message
+from solders.pubkey import Pubkey
+from solders.transaction import Transaction
+
+import config
+
+# Используются только модули solders, которые есть в версии, совместимой с
+# solana-py 0.28 (solana.publickey): инструкции ComputeBudget собираются
+# вручную, а RPC-методы, которых нет в этом клиенте, вызываются через JSON-RPC.
+COMPUTE_BUDGET_PROGRAM_ID = Pubkey.from_string("ComputeBudget111111111111111111111111111111")
+
+# Типы инструкций, для которых ведётся оценка
+LOCK = "lock"
+CLAIM = "claim"
+
+# Лимит вычислительных единиц по умолчанию, пока он не измерен симуляцией
+DEFAULT_COMPUTE_UNIT_LIMIT = 200_000
+# Нижняя граница лимита: измеренное значение не опускается ниже неё
+MIN_COMPUTE_UNIT_LIMIT = {LOCK: 60_000, CLAIM: 80_000}
+# Максимальный лимит на транзакцию в Solana
+MAX_COMPUTE_UNIT_LIMIT = 1_400_000
+# Сообщения контракта, которые пишутся только на полном пути исполнения
+# (в claim ранний выход "No rewards to claim" пропускает оба mint_to)
+FULL_PATH_LOGS = {
+    LOCK: "Program log: Tokens locked.",
+    CLAIM: "Program log: Claiming rewards:",
+}
+# Сколько последних замеров CU хранить и сколько они живут
+COMPUTE_UNIT_SAMPLES = 8
+COMPUTE_UNIT_SAMPLE_TTL_SECONDS = 24 * 60 * 60
+# Не чаще одной симуляции каждого типа за этот период
+COMPUTE_UNIT_RESAMPLE_SECONDS = 10 * 60
+# getRecentPrioritizationFees принимает не более 128 аккаунтов
+MAX_TRACKED_ACCOUNTS = 128
+# Сколько последних слотов хранить в кэше комиссий
+FEE_WINDOW_SLOTS = 150
+
+
+def set_compute_unit_limit(units: int) -> Instruction:
+    """Инструкция ComputeBudget SetComputeUnitLimit (индекс 2, u32)."""
+    return Instruction(COMPUTE_BUDGET_PROGRAM_ID, bytes([2]) + units.to_bytes(4, 'little'), [])
+
+
+def set_compute_unit_price(micro_lamports: int) -> Instruction:
+    """Инструкция ComputeBudget SetComputeUnitPrice (индекс 3, u64, микролампорты)."""
+    return Instruction(COMPUTE_BUDGET_PROGRAM_ID, bytes([3]) + micro_lamports.to_bytes(8, 'little'), [])
+
+
+def _rpc(method: str, params: list, timeout: float = 10.0):
+    """Выполняет JSON-RPC запрос к config.RPC_URL и возвращает поле result."""
+    payload = json.dumps({"jsonrpc": "2.0", "id": 1, "method": method, "params": params}).encode()
+    request = urllib.request.Request(
+        config.RPC_URL, data=payload, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = json.loads(response.read())
+    if "error" in body:
+        raise RuntimeError(f"RPC {method} failed: {body['error']}")
+    return body["result"]
+
+
+def _percentile(values: List[int], percentile: float) -> int:
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class PriorityFeeEstimator:
+    """
+    Кэширующая оценка priority fee и лимита вычислительных единиц.
+
+    Фоновый поток не чаще раза в PRIORITY_FEE_REFRESH_SECONDS запрашивает
+    getRecentPrioritizationFees для отслеживаемых аккаунтов lock/claim и хранит
+    скользящее окно комиссий по слотам. Лимит CU — максимум из нескольких
+    свежих симуляций полного пути инструкции с запасом и нижней границей.
+    Чтение оценок и сборка compute-budget инструкций не делают RPC-запросов.
+
+    Аккаунты и инструкции для симуляции приходят из неаутентифицированных
+    запросов страниц: посетитель может вытеснить реальные аккаунты из
+    LRU-списка (MAX_TRACKED_ACCOUNTS) или выбрать кошелек для симуляции.
+    Поэтому новые аккаунты не ускоряют опрос, симуляции ограничены
+    COMPUTE_UNIT_RESAMPLE_SECONDS, лимит CU берётся как максимум замеров и не
+    опускается ниже MIN_COMPUTE_UNIT_LIMIT, а цена ограничена
+    PRIORITY_FEE_MAX_MICROLAMPORTS.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._accounts: Dict[str, "OrderedDict[str, None]"] = {LOCK: OrderedDict(), CLAIM: OrderedDict()}
+        self._fees: Dict[str, Dict[int, int]] = {LOCK: {}, CLAIM: {}}
+        self._unit_samples: Dict[str, Deque[Tuple[float, int]]] = {
+            LOCK: deque(maxlen=COMPUTE_UNIT_SAMPLES),
+            CLAIM: deque(maxlen=COMPUTE_UNIT_SAMPLES),
+        }
+        self._last_simulation: Dict[str, float] = {}
+        self._last_refresh: Optional[float] = None
+        self._pending_simulations: Dict[str, Tuple[Instruction, Pubkey]] = {}
+
+    def start(self):
+        """Запускает фоновое обновление (повторный вызов ничего не делает)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="priority-fee-estimator", daemon=True)
+            self._thread.start()
+
+    def track(self, kind: str, accounts: Sequence[Pubkey]):
+        """
+        Добавляет записываемые аккаунты инструкции в список для опроса комиссий.
+        Новые аккаунты учитываются при следующем плановом обновлении.
+        """
+        with self._lock:
+            tracked = self._accounts[kind]
+            for account in accounts:
+                key = str(account)
+                tracked.pop(key, None)
+                tracked[key] = None
+            while len(tracked) > MAX_TRACKED_ACCOUNTS:
+                tracked.popitem(last=False)
+        self.start()
+
+    def sample(self, kind: str, instruction: Instruction, payer: Pubkey):
+        """Ставит инструкцию в очередь на симуляцию, если замер этого типа пора обновить."""
+        with self._lock:
+            if kind in self._pending_simulations:
+                return
+            last = self._last_simulation.get(kind)
+            if last is not None and time.monotonic() - last < COMPUTE_UNIT_RESAMPLE_SECONDS:
+                return
+            self._pending_simulations[kind] = (instruction, payer)
+        self.start()
+        self._wakeup.set()
+
+    def compute_unit_limit(self, kind: str) -> int:
+        now = time.monotonic()
+        with self._lock:
+            units = [u for t, u in self._unit_samples[kind] if now - t < COMPUTE_UNIT_SAMPLE_TTL_SECONDS]
+        if not units:
+            return DEFAULT_COMPUTE_UNIT_LIMIT
+        limit = max(MIN_COMPUTE_UNIT_LIMIT[kind], int(max(units) * config.COMPUTE_UNIT_MARGIN))
+        return min(MAX_COMPUTE_UNIT_LIMIT, limit)
+
+    def compute_unit_price(self, kind: str) -> int:
+        """Цена CU в микролампортах по заданному перцентилю последних слотов."""
+        with self._lock:
+            fees = list(self._fees[kind].values())
+        if not fees:
+            return config.PRIORITY_FEE_MIN_MICROLAMPORTS
+        price = _percentile(fees, config.PRIORITY_FEE_PERCENTILE)
+        return max(config.PRIORITY_FEE_MIN_MICROLAMPORTS, min(config.PRIORITY_FEE_MAX_MICROLAMPORTS, price))
+
+    def compute_budget_instructions(self, kind: str) -> List[Instruction]:
+        """Инструкции ComputeBudget на основе кэша, без обращения к RPC."""
+        return [
+            set_compute_unit_limit(self.compute_unit_limit(kind)),
+            set_compute_unit_price(self.compute_unit_price(kind)),
+        ]
+
+    # --- Фоновое обновление ---
+
+    def _run(self):
+        # Пробуждение (только из sample) запускает симуляцию, но не опрос
+        # комиссий: он идёт не чаще раза в PRIORITY_FEE_REFRESH_SECONDS.
+        while True:
+            self._wakeup.clear()
+            self._run_pending_simulations()
+            interval = config.PRIORITY_FEE_REFRESH_SECONDS
+            now = time.monotonic()
+            if self._last_refresh is None or now - self._last_refresh >= interval:
+                self._last_refresh = now
+                for kind in (LOCK, CLAIM):
+                    try:
+                        self._refresh_fees(kind)
+                    except Exception as e:
+                        print(f"WARNING: Could not refresh priority fees for {kind}: {e}")
+            self._wakeup.wait(max(0.0, self._last_refresh + interval - time.monotonic()))
+
+    def _refresh_fees(self, kind: str):
+        with self._lock:
+            accounts = list(self._accounts[kind])
+        result = _rpc("getRecentPrioritizationFees", [accounts] if accounts else [])
+        with self._lock:
+            fees = self._fees[kind]
+            for item in result:
+                fees[item["slot"]] = item["prioritizationFee"]
+            for slot in sorted(fees)[:-FEE_WINDOW_SLOTS]:
+                del fees[slot]
+
+    def _run_pending_simulations(self):
+        with self._lock:
+            pending = dict(self._pending_simulations)
+        for kind, (instruction, payer) in pending.items():
+            try:
+                units = self._simulate(kind, instruction, payer)
+            except Exception as e:
+                print(f"WARNING: Could not simulate {kind} instruction: {e}")
+                units = None
+            with self._lock:
+                self._pending_simulations.pop(kind, None)
+                self._last_simulation[kind] = time.monotonic()
+                if units:
+                    self._unit_samples[kind].append((time.monotonic(), units))
+
+    def _simulate(self, kind: str, instruction: Instruction, payer: Pubkey) -> Optional[int]:
+        """
+        Симулирует инструкцию без подписи и возвращает потраченные CU.
+        Возвращает None, если симуляция упала или контракт вышел раньше полного пути.
+        """
+        # Транзакция не подписана и без blockhash: нода подставит свежий
+        # (replaceRecentBlockhash) и не будет проверять подписи (sigVerify).
+        message = Message([set_compute_unit_limit(MAX_COMPUTE_UNIT_LIMIT), instruction], payer)
+        encoded = base64.b64encode(bytes(Transaction.new_unsigned(message))).decode()
+        result = _rpc("simulateTransaction", [
+            encoded,
+            {"encoding": "base64", "sigVerify": False, "replaceRecentBlockhash": True, "commitment": "processed"},
+        ])["value"]
+        if result.get("err") is not None:
+            print(f"WARNING: Simulation of {kind} instruction failed: {result['err']}")
+            return None
+        if not any(line.startswith(FULL_PATH_LOGS[kind]) for line in result.get("logs") or []):
+            print(f"INFO: Simulation of {kind} instruction took an early-exit path, ignoring it")
+            return None
+        return result.get("unitsConsumed")
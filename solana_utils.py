@@ -6,10 +6,12 @@ from solana.rpc.api import Client
 from solana.rpc.types import TxOpts
 from solana.rpc.commitment import Confirmed
 from spl.token.client import Token
+from spl.token.instructions import get_associated_token_address as spl_get_associated_token_address
 from solana.publickey import PublicKey
 import borsh
 from construct import Struct, Bytes, Int64ul, Int64sl, Flag
 import db  # Для получения адреса кошелька пользователя
+import fee_estimator
 from typing import Optional, Tuple
 
 # --- КОНСТАНТЫ ---
@@ -21,6 +23,9 @@ TOKEN_MINT_ADDRESS = Pubkey.from_string(config.TOKEN_MINT_ADDRESS)
 # Подключение к сети Solana
 solana_client = Client(config.RPC_URL)
 
+# Кэш priority fee и лимитов CU для транзакций lock/claim (обновляется в фоне)
+priority_fees = fee_estimator.PriorityFeeEstimator()
+
 # --- СХЕМА ДАННЫХ КОНТРАКТА ---
 
 LOCK_DETAILS_SCHEMA = Struct(
@@ -155,11 +160,7 @@ def create_lock_instruction(user_pubkey: Pubkey, lock_pda: Pubkey, user_ata: Pub
     CLOCK_SYSVAR = Pubkey.from_string("SysvarC1ock11111111111111111111111111111111")
     
     # PDA токен-аккаунт для хранения заблокированных токенов
-    pda_ata_public = Token.get_associated_token_address(
-        owner=PublicKey(str(lock_pda)),
-        mint=PublicKey(str(TOKEN_MINT_ADDRESS))
-    )
-    pda_ata = Pubkey.from_string(str(pda_ata_public))
+    pda_ata = get_associated_token_address(lock_pda)
     
     # Аккаунты, которые требует наша инструкция в контракте
     accounts = [
@@ -215,4 +216,17 @@ def create_claim_instruction(
         program_id=PROGRAM_ID,
         accounts=accounts,
         data=instruction_data
-    ) 
\ No newline at end of file
+    )
+
+def get_associated_token_address(owner: Pubkey) -> Pubkey:
+    """Находит ATA токена SDCB для владельца."""
+    ata = spl_get_associated_token_address(
+        owner=PublicKey(str(owner)),
+        mint=PublicKey(str(TOKEN_MINT_ADDRESS))
+    )
+    return Pubkey.from_string(str(ata))
+
+def get_mint_authority_pda() -> Pubkey:
+    """Находит PDA, являющийся mint authority программы."""
+    pda, _ = Pubkey.find_program_address(seeds=[b"mint_authority"], program_id=PROGRAM_ID)
+    return pda
@@ -3,7 +3,10 @@ from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from typing import Optional
 from telegram import Bot
+from solders.pubkey import Pubkey
 import config
+import fee_estimator
+import solana_utils
 
 app = FastAPI()
 
@@ -11,6 +14,54 @@ app = FastAPI()
 templates = Jinja2Templates(directory="templates")
 
 
+@app.on_event("startup")
+async def start_fee_estimator():
+    """Запускаем фоновое обновление priority fee, чтобы кэш был прогрет к первому запросу."""
+    solana_utils.priority_fees.start()
+
+
+def build_page_instruction(kind: str, user_pubkey: Pubkey, amount: Optional[int]):
+    """Собирает ту же инструкцию, которую страница построит и подпишет в браузере."""
+    lock_pda, _ = solana_utils.get_lock_pda(user_pubkey)
+    user_ata = solana_utils.get_associated_token_address(user_pubkey)
+    if kind == fee_estimator.LOCK:
+        return solana_utils.create_lock_instruction(user_pubkey, lock_pda, user_ata, amount or 0)
+    # Без адреса владельца комиссия идёт на ATA пользователя (как в claim.html)
+    try:
+        owner_ata = solana_utils.get_associated_token_address(Pubkey.from_string(config.OWNER_WALLET))
+    except ValueError:
+        owner_ata = user_ata
+    return solana_utils.create_claim_instruction(
+        user_pubkey, lock_pda, user_ata, owner_ata,
+        solana_utils.TOKEN_MINT_ADDRESS, solana_utils.get_mint_authority_pda()
+    )
+
+
+def compute_budget_context(kind: str, user_wallet: Optional[str], amount: Optional[int] = None) -> dict:
+    """
+    Возвращает лимит CU и цену CU для шаблона из кэша оценщика (без RPC).
+    Записываемые аккаунты инструкции передаются оценщику для опроса комиссий,
+    а сама инструкция — на периодическую симуляцию. Lock симулируется только
+    с реальной суммой из ссылки бота, иначе замер не отражает перевод токенов.
+    """
+    if user_wallet:
+        try:
+            user_pubkey = Pubkey.from_string(user_wallet)
+            instruction = build_page_instruction(kind, user_pubkey, amount)
+        except Exception as e:
+            print(f"WARNING: Could not build {kind} instruction for fee estimation ({user_wallet}): {e}")
+        else:
+            solana_utils.priority_fees.track(
+                kind, [meta.pubkey for meta in instruction.accounts if meta.is_writable]
+            )
+            if kind == fee_estimator.CLAIM or (amount or 0) > 0:
+                solana_utils.priority_fees.sample(kind, instruction, user_pubkey)
+    return {
+        "compute_unit_limit": solana_utils.priority_fees.compute_unit_limit(kind),
+        "compute_unit_price": solana_utils.priority_fees.compute_unit_price(kind),
+    }
+
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(
     request: Request,
@@ -37,7 +88,8 @@ async def read_root(
         "amount_display": amount_display,
         "assoc_token_program_id": config.ASSOCIATED_TOKEN_PROGRAM_ID,
         "program_id": config.PROGRAM_ID,
-        "mint_address": config.TOKEN_MINT_ADDRESS
+        "mint_address": config.TOKEN_MINT_ADDRESS,
+        **compute_budget_context(fee_estimator.LOCK, user_wallet, amount),
     }
     return templates.TemplateResponse("index.html", context)
 
@@ -56,7 +108,8 @@ async def claim_page(
         "owner_wallet": config.OWNER_WALLET,
         "mint_address": config.TOKEN_MINT_ADDRESS,
         "program_id": config.PROGRAM_ID,
-        "assoc_token_program_id": config.ASSOCIATED_TOKEN_PROGRAM_ID
+        "assoc_token_program_id": config.ASSOCIATED_TOKEN_PROGRAM_ID,
+        **compute_budget_context(fee_estimator.CLAIM, user_wallet),
     }
     return templates.TemplateResponse("claim.html", context)
 